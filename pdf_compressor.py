@@ -7,36 +7,76 @@ import tempfile
 import shutil
 import io
 import hashlib
+import re
+import mmap
+import threading
+from contextlib import contextmanager
 from collections import defaultdict
+from functools import lru_cache
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
 
-try:
-    import fitz 
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
-
-try:
-    from PIL import Image, ImageOps
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-
-try:
-    import pikepdf
-    PIKEPDF_AVAILABLE = True
-except ImportError:
-    PIKEPDF_AVAILABLE = False
-
-try:
-    from pypdf import PdfWriter, PdfReader
-    PYPDF_AVAILABLE = True
-except ImportError:
-    PYPDF_AVAILABLE = False
+# Libraries are imported on first use so worker processes only load what they need
+
+@lru_cache(maxsize=None)
+def _lazy_import_fitz():
+    try:
+        import fitz
+        return fitz
+    except ImportError:
+        return None
+
+@lru_cache(maxsize=None)
+def _lazy_import_pil():
+    try:
+        from PIL import Image
+        return Image
+    except ImportError:
+        return None
+
+@lru_cache(maxsize=None)
+def _lazy_import_numpy():
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+@lru_cache(maxsize=None)
+def _lazy_import_pikepdf():
+    try:
+        import pikepdf
+        return pikepdf
+    except ImportError:
+        return None
+
+@lru_cache(maxsize=None)
+def _lazy_import_pypdf():
+    try:
+        import pypdf
+        return pypdf
+    except ImportError:
+        return None
+
+def pymupdf_available():
+    return _lazy_import_fitz() is not None
+
+def pil_available():
+    return _lazy_import_pil() is not None
+
+def numpy_available():
+    return _lazy_import_numpy() is not None
+
+def pikepdf_available():
+    return _lazy_import_pikepdf() is not None
+
+def pypdf_available():
+    return _lazy_import_pypdf() is not None
 
 INPUT_DIR = "input_pdfs"
 OUTPUT_DIR = "output_pdfs" 
 LOG_DIR = "logs"
 COMPRESSION_LEVEL = "recommended"
+MMAP_THRESHOLD = 50_000_000
 
 COMPRESSION_SETTINGS = {
     "high": {
@@ -45,6 +85,8 @@ COMPRESSION_SETTINGS = {
         "compress_images": True,
         "image_dpi": 150,
         "jpeg_quality": 60,
+        "jpeg_progressive": True,
+        "jpeg_subsampling": 2,
         "remove_metadata": True,
         "flatten_forms": True
     },
@@ -54,6 +96,8 @@ COMPRESSION_SETTINGS = {
         "compress_images": True,
         "image_dpi": 200,
         "jpeg_quality": 75,
+        "jpeg_progressive": True,
+        "jpeg_subsampling": 2,
         "remove_metadata": False,
         "flatten_forms": False
     },
@@ -63,15 +107,153 @@ COMPRESSION_SETTINGS = {
         "compress_images": True,
         "image_dpi": 300,
         "jpeg_quality": 90,
+        "jpeg_progressive": True,
+        "jpeg_subsampling": 1,
         "remove_metadata": False,
         "flatten_forms": False
     }
 }
 
+# libjpeg's standard luminance quantization table (quality 50)
+JPEG_LUMINANCE_TABLE = [
+    16, 11, 10, 16, 24, 40, 51, 61, 12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56, 14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77, 24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101, 72, 92, 95, 98, 112, 100, 103, 99
+]
+
+def _estimate_jpeg_quality(quantization):
+    """Estimate the libjpeg quality setting a JPEG was saved with from its quantization tables"""
+    if not quantization or 0 not in quantization:
+        return None
+    
+    scale = sum(quantization[0]) * 100 / sum(JPEG_LUMINANCE_TABLE)
+    if scale <= 0:
+        return None
+    if scale <= 100:
+        return round((200 - scale) / 2)
+    return round(5000 / scale)
+
+_thread_buffers = threading.local()
+
+def _encode_buffer():
+    """Return this thread's reusable encode buffer, emptied"""
+    output = getattr(_thread_buffers, "output", None)
+    if output is None:
+        output = _thread_buffers.output = io.BytesIO()
+    output.seek(0)
+    output.truncate()
+    return output
+
+def _png_idat(png_bytes):
+    """Concatenate a PNG's IDAT chunks: a zlib stream with PNG row predictors"""
+    idat = []
+    pos = 8
+    while pos < len(png_bytes):
+        length = int.from_bytes(png_bytes[pos:pos + 4], "big")
+        if png_bytes[pos + 4:pos + 8] == b"IDAT":
+            idat.append(png_bytes[pos + 8:pos + 8 + length])
+        pos += length + 12
+    return b"".join(idat)
+
+def _reencode_image(img, image_ext, original_size, max_dimension, quality, progressive, subsampling):
+    """Resize and re-encode an image, returning None if nothing was gained"""
+    Image = _lazy_import_pil()
+    if original_size < 10000:
+        return None
+    
+    is_jpeg = image_ext.lower() in ['jpg', 'jpeg']
+    # CMYK JPEGs are left alone, so bail out before any decoding or resizing
+    if is_jpeg and img.mode == 'CMYK':
+        return None
+    
+    needs_resize = img.width > max_dimension or img.height > max_dimension
+    
+    # Re-encoding a JPEG already at or below the target quality only adds artifacts
+    if is_jpeg and not needs_resize:
+        source_quality = _estimate_jpeg_quality(getattr(img, 'quantization', None))
+        if source_quality is not None and source_quality <= quality:
+            return None
+    
+    if is_jpeg and needs_resize:
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale; the size is re-read below
+        ratio = min(max_dimension / img.width, max_dimension / img.height)
+        img.draft(img.mode, (int(img.width * ratio), int(img.height * ratio)))
+    
+    if img.width > max_dimension or img.height > max_dimension:
+        ratio = min(max_dimension / img.width, max_dimension / img.height)
+        new_size = (int(img.width * ratio), int(img.height * ratio))
+        # LANCZOS only pays off visibly for large reductions
+        resample = Image.Resampling.LANCZOS if ratio < 0.5 else Image.Resampling.BILINEAR
+        img = img.resize(new_size, resample)
+    
+    output = _encode_buffer()
+    
+    if is_jpeg or img.mode == 'RGB':
+        if img.mode in ('RGBA', 'P'):
+            rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+            if img.mode == 'RGBA':
+                rgb_img.paste(img, mask=img.split()[-1])
+            else:
+                rgb_img.paste(img)
+            img = rgb_img
+        
+        output_format = 'JPEG'
+        img.save(output, format='JPEG', quality=quality, optimize=True,
+                 progressive=progressive, subsampling=subsampling)
+    else:
+        if img.mode not in ('L', 'RGB'):
+            img = img.convert('L' if img.mode in ('1', 'LA') else 'RGB')
+        output_format = 'PNG'
+        img.save(output, format='PNG', optimize=True)
+    
+    size = output.tell()
+    if output_format == 'PNG':
+        with output.getbuffer() as view:
+            png_bytes = bytes(view[:size])
+        # Only the IDAT data ends up in the PDF, so that is what has to beat the original
+        if len(_png_idat(png_bytes)) < original_size:
+            return png_bytes
+        return None
+    
+    # Only copy the encoded data out of the shared buffer when it is worth keeping
+    if size < original_size:
+        with output.getbuffer() as view:
+            return bytes(view[:size])
+    return None
+
+def _apply_reencoded(doc, xref, new_bytes):
+    """Replace the image stream under xref with re-encoded JPEG or PNG bytes"""
+    Image = _lazy_import_pil()
+    img = Image.open(io.BytesIO(new_bytes))
+    
+    # JPEG data is stored as-is; PNG image data is a Flate stream with PNG predictors
+    if img.format == 'JPEG':
+        doc.update_stream(xref, new_bytes, compress=0)
+        doc.xref_set_key(xref, "Filter", "/DCTDecode")
+        doc.xref_set_key(xref, "DecodeParms", "null")
+    else:
+        colors = 1 if img.mode == 'L' else 3
+        doc.update_stream(xref, _png_idat(new_bytes), compress=0)
+        doc.xref_set_key(xref, "Filter", "/FlateDecode")
+        doc.xref_set_key(xref, "DecodeParms",
+                         f"<</Predictor 15 /Colors {colors} /BitsPerComponent 8 /Columns {img.width}>>")
+    
+    doc.xref_set_key(xref, "Decode", "null")
+    if doc.xref_get_key(xref, "Mask")[0] == "array":
+        doc.xref_set_key(xref, "Mask", "null")
+    doc.xref_set_key(xref, "Width", str(img.width))
+    doc.xref_set_key(xref, "Height", str(img.height))
+    doc.xref_set_key(xref, "BitsPerComponent", "8")
+    doc.xref_set_key(xref, "ColorSpace", "/DeviceGray" if img.mode == 'L' else "/DeviceRGB")
+
 class PDFCompressor:
-    def __init__(self):
-        self.setup_directories()
-        self.setup_logging()
+    def __init__(self, settings=None, logger=None, image_threads=None):
+        if logger is None:
+            self.setup_directories()
+            self.setup_logging()
+        else:
+            self.logger = logger
         self.compression_stats = {
             'files_processed': 0,
             'total_original_size': 0,
@@ -81,7 +263,14 @@ class PDFCompressor:
             'duplicate_pages_removed': 0,
             'images_optimized': 0
         }
-        self.settings = COMPRESSION_SETTINGS[COMPRESSION_LEVEL]
+        self.settings = settings or COMPRESSION_SETTINGS[COMPRESSION_LEVEL]
+        self._max_dim = self.settings["image_dpi"] * 8.5
+        self._jpeg_q = self.settings["jpeg_quality"]
+        self._jpeg_progressive = self.settings["jpeg_progressive"]
+        self._jpeg_subsampling = self.settings["jpeg_subsampling"]
+        self._remove_blank = self.settings["remove_blank_pages"]
+        self._remove_dup = self.settings["remove_duplicate_pages"]
+        self.image_threads = image_threads or os.cpu_count() or 1
 
     def setup_directories(self):
         """Create necessary directories if they don't exist"""
@@ -119,18 +308,20 @@ class PDFCompressor:
         self.logger.info(f"Output directory: {OUTPUT_DIR}")
         
         libs_available = []
-        if PYMUPDF_AVAILABLE:
+        if pymupdf_available():
             libs_available.append("PyMuPDF")
-        if PIL_AVAILABLE:
+        if pil_available():
             libs_available.append("Pillow")
-        if PIKEPDF_AVAILABLE:
+        if numpy_available():
+            libs_available.append("numpy")
+        if pikepdf_available():
             libs_available.append("pikepdf")
-        if PYPDF_AVAILABLE:
+        if pypdf_available():
             libs_available.append("pypdf")
         
         self.logger.info(f"Available libraries: {', '.join(libs_available)}")
         
-        if not (PYMUPDF_AVAILABLE or PIKEPDF_AVAILABLE or PYPDF_AVAILABLE):
+        if not (pymupdf_available() or pikepdf_available() or pypdf_available()):
             self.logger.error("No PDF libraries available!")
             self.logger.info("Install with: pip install PyMuPDF pikepdf pypdf Pillow")
             sys.exit(1)
@@ -141,173 +332,311 @@ class PDFCompressor:
 
     def format_size(self, size_bytes):
         """Format file size in human readable format"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.2f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.2f} TB"
-
-    def is_page_blank(self, page):
-        """Check if a page is essentially blank using text and drawing content"""
-        try:
-            text_content = page.get_text().strip()
-            
-            if len(text_content) > 10: 
-                return False
-            
-            drawings = page.get_drawings()
-            if len(drawings) > 2: 
-                return False
-            
-            images = page.get_images()
-            if len(images) > 0:
-                return False
-            
-            return True
-            
-        except Exception as e:
-            self.logger.warning(f"Error checking if page is blank: {e}")
+        units = ('B', 'KB', 'MB', 'GB', 'TB')
+        index = min(len(units) - 1, max(0, (int(size_bytes).bit_length() - 1) // 10))
+        return f"{size_bytes / (1 << (index * 10)):.2f} {units[index]}"
+
+    def _is_blank(self, text, images, drawings):
+        """Check if a page is essentially blank using its image, text and drawing content"""
+        if len(images) > 0:
+            return False
+        
+        if len(text) > 10:
+            return False
+        
+        if len(drawings) > 2:
             return False
+        
+        return True
+
+    def _is_visually_blank(self, page):
+        """Render a tiny grayscale thumbnail and check that it is uniformly near-white"""
+        fitz = _lazy_import_fitz()
+        np = _lazy_import_numpy()
+        pix = page.get_pixmap(matrix=fitz.Matrix(0.05, 0.05), colorspace=fitz.csGRAY)
+        samples = np.frombuffer(pix.samples, dtype=np.uint8)
+        return samples.std() < 2 and samples.mean() > 240
 
-    def get_page_content_hash(self, page):
+    def _hash_content(self, text, images, drawings):
         """Generate a hash of page content to detect duplicates"""
-        try:
-            text_content = page.get_text()
-            images = page.get_images()
-            drawings = page.get_drawings()
-            
-            content_parts = [
-                text_content.strip(),
-                str(len(images)),
-                str(len(drawings))
-            ]
-            
-            for img in images[:5]: 
-                content_parts.append(str(img[1:4]))  
-            
-            content_string = "|".join(content_parts)
-            return hashlib.md5(content_string.encode()).hexdigest()
-            
-        except Exception as e:
-            self.logger.warning(f"Error generating page hash: {e}")
-            return None
+        hasher = hashlib.blake2b(digest_size=8)
+        hasher.update(text.encode())
+        hasher.update(b"|")
+        hasher.update(str(len(images)).encode())
+        hasher.update(b"|")
+        hasher.update(str(len(drawings)).encode())
+        
+        for img in images[:5]: 
+            hasher.update(b"|")
+            hasher.update(str(img[1:4]).encode())
+        
+        return hasher.digest()
 
-    def optimize_image_in_pdf(self, doc, xref):
-        """Optimize a single image in the PDF"""
-        try:
-            if not PIL_AVAILABLE:
-                return False
+    def _stream_length(self, doc, xref):
+        """Get the stored (encoded) size of a stream without decoding it"""
+        length_type, length = doc.xref_get_key(xref, "Length")
+        if length_type == "int":
+            return int(length)
+        return len(doc.xref_stream_raw(xref) or b"")
 
-            base_image = doc.extract_image(xref)
-            image_bytes = base_image["image"]
-            image_ext = base_image["ext"]
-            
-            img = Image.open(io.BytesIO(image_bytes))
-            original_size = len(image_bytes)
-            
-            if original_size < 10000: 
+    def _jpeg_relabel_safe(self, doc, xref):
+        """Check that a DCT image's samples keep their meaning once relabelled as Device colour"""
+        # Pillow decodes JPEGs to raw samples, so a non-default /Decode would be lost
+        decode_type, decode = doc.xref_get_key(xref, "Decode")
+        if decode_type == "array":
+            values = decode.strip("[]").split()
+            if any(float(v) != i % 2 for i, v in enumerate(values)):
                 return False
-            
-            max_dimension = self.settings["image_dpi"] * 8.5 
-            if img.width > max_dimension or img.height > max_dimension:
-                ratio = min(max_dimension / img.width, max_dimension / img.height)
-                new_size = (int(img.width * ratio), int(img.height * ratio))
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
-                self.logger.debug(f"Resized image to {new_size}")
-            
-            output = io.BytesIO()
-            
-            if image_ext.lower() in ['jpg', 'jpeg'] or img.mode == 'RGB':
-                if img.mode in ('RGBA', 'P'):
-                    rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'RGBA':
-                        rgb_img.paste(img, mask=img.split()[-1])
-                    else:
-                        rgb_img.paste(img)
-                    img = rgb_img
-                
-                img.save(output, format='JPEG', 
-                        quality=self.settings["jpeg_quality"],
-                        optimize=True)
-            else:
-                img.save(output, format='PNG', optimize=True)
-            
-            optimized_bytes = output.getvalue()
-            
-            if len(optimized_bytes) < original_size:
-                doc.update_stream(xref, optimized_bytes)
-                compression_ratio = (1 - len(optimized_bytes) / original_size) * 100
-                self.logger.debug(f"Optimized image: {compression_ratio:.1f}% reduction")
-                return True
-            
+        elif decode_type != "null":
             return False
-            
-        except Exception as e:
-            self.logger.warning(f"Failed to optimize image: {e}")
+        
+        cs_type, cs = doc.xref_get_key(xref, "ColorSpace")
+        if cs_type == "xref":
+            cs = doc.xref_object(int(cs.split()[0]), compressed=True)
+        elif cs_type == "null":
             return False
+        return cs in ("/DeviceGray", "/DeviceRGB", "/DeviceCMYK") or cs.lstrip("[ ").startswith("/ICCBased")
+
+    def _load_image(self, doc, xref):
+        """Load an image for re-encoding, decoding non-JPEG streams natively with MuPDF"""
+        fitz = _lazy_import_fitz()
+        Image = _lazy_import_pil()
+        if "DCTDecode" not in doc.xref_get_key(xref, "Filter")[1]:
+            pix = fitz.Pixmap(doc, xref)
+            # MuPDF keeps decoded images in its resource store; drop them so
+            # memory doesn't grow with every image in the document
+            fitz.TOOLS.store_shrink(100)
+            if pix.colorspace:
+                if pix.alpha:
+                    pix = fitz.Pixmap(pix, 0)
+                # Samples in any other space (Separation, DeviceN, Lab, ...) would be
+                # relabelled as Device colour on write-back, so convert them to RGB first
+                name = pix.colorspace.name
+                if not (name in ("DeviceGray", "DeviceRGB", "DeviceCMYK") or name.startswith("ICCBased")):
+                    pix = fitz.Pixmap(fitz.csRGB, pix)
+                mode = {1: 'L', 3: 'RGB', 4: 'CMYK'}.get(pix.colorspace.n)
+                if mode:
+                    return Image.frombytes(mode, (pix.width, pix.height), pix.samples), "raw"
+        
+        # JPEG streams are passed through undecoded; images MuPDF decodes without
+        # a colorspace (e.g. stencil masks) go through extract_image
+        base_image = doc.extract_image(xref)
+        return Image.open(io.BytesIO(base_image["image"])), base_image["ext"]
+
+    def _image_key(self, doc, xref):
+        """Hash an image's stream and dictionary, including every object they reference"""
+        hasher = hashlib.blake2b(digest_size=16)
+        pending = [xref]
+        visited = set()
+        while pending:
+            current = pending.pop()
+            if current in visited:
+                continue
+            visited.add(current)
+            
+            obj = re.sub(r"/Length \d+( \d+ R\b)?", "", doc.xref_object(current, compressed=True))
+            # Referenced objects (palette, ICC profile, SMask, ...) are hashed by content,
+            # so copies of one image under different object numbers still match
+            hasher.update(re.sub(r"\d+ \d+ R\b", "R", obj).encode())
+            hasher.update(b"\0")
+            if doc.xref_is_stream(current):
+                hasher.update(doc.xref_stream_raw(current))
+                hasher.update(b"\0")
+            pending.extend(int(ref) for ref in reversed(re.findall(r"(\d+) \d+ R\b", obj)))
+        
+        return hasher.digest()
+
+    def _apply_to_xrefs(self, doc, xrefs, optimized_bytes, original_size):
+        """Write re-encoded image bytes to every xref sharing the same image data"""
+        applied = 0
+        for xref in xrefs:
+            try:
+                _apply_reencoded(doc, xref, optimized_bytes)
+                applied += 1
+            except Exception as e:
+                self.logger.warning(f"Failed to optimize image: {e}")
+        
+        if applied:
+            compression_ratio = (1 - len(optimized_bytes) / original_size) * 100
+            self.logger.debug(f"Optimized {applied} image(s): {compression_ratio:.1f}% reduction")
+        return applied
+
+    def _apply_finished(self, doc, pending, xrefs_by_key):
+        """Wait for at least one re-encode to finish, apply its result and drop it"""
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        images_optimized = 0
+        for future in done:
+            key, original_size = pending.pop(future)
+            try:
+                optimized_bytes = future.result()
+            except Exception as e:
+                self.logger.warning(f"Failed to optimize image: {e}")
+                continue
+            
+            if optimized_bytes is not None:
+                images_optimized += self._apply_to_xrefs(doc, xrefs_by_key[key], optimized_bytes, original_size)
+        return images_optimized
+
+    def optimize_images(self, doc):
+        """Re-encode all images in the document in parallel and return the number optimized"""
+        seen = set()
+        xrefs_by_key = defaultdict(list)
+        candidates = {}
+        for page in doc:
+            for img in page.get_images():
+                xref = img[0]
+                if xref in seen:
+                    continue
+                seen.add(xref)
+                try:
+                    original_size = self._stream_length(doc, xref)
+                    if original_size < 10000:
+                        continue
+                    if doc.xref_get_key(xref, "ImageMask")[1] == "true":
+                        continue
+                    if ("DCTDecode" in doc.xref_get_key(xref, "Filter")[1]
+                            and not self._jpeg_relabel_safe(doc, xref)):
+                        continue
+                    
+                    # Identical image data under different xrefs is re-encoded once
+                    key = self._image_key(doc, xref)
+                    xrefs_by_key[key].append(xref)
+                    if key not in candidates:
+                        candidates[key] = (xref, original_size)
+                except Exception as e:
+                    self.logger.warning(f"Failed to inspect image {xref}: {e}")
+        
+        # Images are decoded just before submission and only a small window is in
+        # flight at once, so memory tracks the largest images rather than their total
+        window = self.image_threads * 2
+        images_optimized = 0
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.image_threads) as executor:
+            for key, (xref, original_size) in candidates.items():
+                if len(pending) >= window:
+                    images_optimized += self._apply_finished(doc, pending, xrefs_by_key)
+                
+                try:
+                    img, image_ext = self._load_image(doc, xref)
+                except Exception as e:
+                    self.logger.warning(f"Failed to extract image {xref}: {e}")
+                    continue
+                
+                future = executor.submit(_reencode_image, img, image_ext, original_size,
+                                         self._max_dim, self._jpeg_q,
+                                         self._jpeg_progressive, self._jpeg_subsampling)
+                pending[future] = (key, original_size)
+                del img
+            
+            while pending:
+                images_optimized += self._apply_finished(doc, pending, xrefs_by_key)
+        
+        return images_optimized
+
+    @contextmanager
+    def _open_document(self, input_path):
+        """Open a PDF with PyMuPDF, memory-mapping files large enough to benefit"""
+        fitz = _lazy_import_fitz()
+        if self.get_file_size(input_path) <= MMAP_THRESHOLD:
+            doc = fitz.open(input_path)
+            try:
+                yield doc
+            finally:
+                doc.close()
+            return
+        
+        fd = os.open(input_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            mapping = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        
+        # PyMuPDF reads a memoryview in place, letting the OS page in only what MuPDF touches
+        view = memoryview(mapping)
+        try:
+            doc = fitz.open(stream=view, filetype="pdf")
+            try:
+                yield doc
+            finally:
+                doc.close()
+        finally:
+            view.release()
+            mapping.close()
 
     def compress_with_pymupdf_advanced(self, input_path, output_path):
         """Advanced compression using PyMuPDF with content optimization"""
         try:
-            doc = fitz.open(input_path)
-            pages_to_keep = []
-            page_hashes = set()
-            images_optimized = 0
-            blank_pages_removed = 0
-            duplicate_pages_removed = 0
+            with self._open_document(input_path) as doc:
+                pages_to_keep = []
+                page_hashes = set()
+                images_optimized = 0
+                blank_pages_removed = 0
+                duplicate_pages_removed = 0
             
-            self.logger.info(f"Analyzing {len(doc)} pages for optimization...")
+                self.logger.info(f"Analyzing {len(doc)} pages for optimization...")
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
+                for page_num in range(len(doc)):
+                    if not (self._remove_blank or self._remove_dup):
+                        pages_to_keep.append(page_num)
+                        continue
                 
-                if self.settings["remove_blank_pages"] and self.is_page_blank(page):
-                    self.logger.debug(f"Page {page_num + 1} is blank - will remove")
-                    blank_pages_removed += 1
-                    continue
+                    page = doc[page_num]
+                    try:
+                        # Probe cheapest-first and stop once neither check needs more
+                        images = page.get_images()
+                        text = page.get_text().strip()
+                    
+                        drawings = []
+                        if self._remove_dup or (self._remove_blank and not images and len(text) <= 10):
+                            drawings = page.get_cdrawings()
+                    except Exception as e:
+                        self.logger.warning(f"Error analyzing page {page_num + 1}: {e}")
+                        pages_to_keep.append(page_num)
+                        continue
                 
-                if self.settings["remove_duplicate_pages"]:
-                    page_hash = self.get_page_content_hash(page)
-                    if page_hash and page_hash in page_hashes:
-                        self.logger.debug(f"Page {page_num + 1} is duplicate - will remove")
-                        duplicate_pages_removed += 1
+                    if self._remove_blank and self._is_blank(text, images, drawings):
+                        self.logger.debug(f"Page {page_num + 1} is blank - will remove")
+                        blank_pages_removed += 1
                         continue
-                    if page_hash:
+                
+                    # Pages with little text but some images or drawings may still render
+                    # as an empty page, e.g. white scans or background-only rectangles
+                    if self._remove_blank and numpy_available() and len(text) <= 10:
+                        try:
+                            if self._is_visually_blank(page):
+                                self.logger.debug(f"Page {page_num + 1} renders blank - will remove")
+                                blank_pages_removed += 1
+                                continue
+                        except Exception as e:
+                            self.logger.warning(f"Error rendering page {page_num + 1}: {e}")
+                
+                    if self._remove_dup:
+                        page_hash = self._hash_content(text, images, drawings)
+                        if page_hash in page_hashes:
+                            self.logger.debug(f"Page {page_num + 1} is duplicate - will remove")
+                            duplicate_pages_removed += 1
+                            continue
                         page_hashes.add(page_hash)
                 
-                pages_to_keep.append(page_num)
-            
-            self.logger.info(f"Keeping {len(pages_to_keep)} pages (removed {blank_pages_removed} blank, {duplicate_pages_removed} duplicate)")
+                    pages_to_keep.append(page_num)
             
-            new_doc = fitz.open()
-            for page_num in pages_to_keep:
-                new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+                self.logger.info(f"Keeping {len(pages_to_keep)} pages (removed {blank_pages_removed} blank, {duplicate_pages_removed} duplicate)")
             
-            doc.close()
-            doc = new_doc
-            
-            if self.settings["compress_images"] and PIL_AVAILABLE:
-                for page_num in range(len(doc)):
-                    page = doc[page_num]
-                    images = page.get_images()
-                    
-                    for img in images:
-                        xref = img[0]
-                        if self.optimize_image_in_pdf(doc, xref):
-                            images_optimized += 1
+                if len(pages_to_keep) < len(doc):
+                    doc.select(pages_to_keep)
             
-            if self.settings.get("remove_metadata", False):
-                metadata = doc.metadata
-                for key in list(metadata.keys()):
-                    metadata[key] = ""
-                doc.set_metadata(metadata)
+                if self.settings["compress_images"] and pil_available():
+                    images_optimized = self.optimize_images(doc)
             
-            doc.save(output_path, 
-                    garbage=4,     
-                    deflate=True,   
-                    clean=True)    
+                if self.settings.get("remove_metadata", False):
+                    # An empty dict drops the /Info dictionary instead of blanking each entry
+                    doc.set_metadata({})
+                    doc.del_xml_metadata()
             
-            doc.close()
+                doc.save(output_path, 
+                        garbage=4,     
+                        deflate=True,   
+                        clean=True)    
             
             self.compression_stats['blank_pages_removed'] += blank_pages_removed
             self.compression_stats['duplicate_pages_removed'] += duplicate_pages_removed
@@ -326,6 +655,7 @@ class PDFCompressor:
 
     def compress_with_pikepdf_enhanced(self, input_path, output_path):
         """Enhanced compression using pikepdf"""
+        pikepdf = _lazy_import_pikepdf()
         try:
             with pikepdf.open(input_path) as pdf:
                 pdf.save(output_path, 
@@ -342,9 +672,10 @@ class PDFCompressor:
 
     def compress_with_pypdf_optimized(self, input_path, output_path):
         """Optimized compression using pypdf with content stream compression"""
+        pypdf = _lazy_import_pypdf()
         try:
-            reader = PdfReader(input_path)
-            writer = PdfWriter()
+            reader = pypdf.PdfReader(input_path)
+            writer = pypdf.PdfWriter()
             
             pages_added = 0
             for page_num in range(len(reader.pages)):
@@ -383,53 +714,72 @@ class PDFCompressor:
         """Compress a single PDF file with advanced content optimization"""
         original_size = self.get_file_size(input_path)
         
-        methods_to_try = []
-        
-        if PYMUPDF_AVAILABLE:
-            methods_to_try.append(("PyMuPDF Advanced", self.compress_with_pymupdf_advanced))
-        
-        if PIKEPDF_AVAILABLE:
-            methods_to_try.append(("pikepdf Enhanced", self.compress_with_pikepdf_enhanced))
-        
-        if PYPDF_AVAILABLE:
-            methods_to_try.append(("pypdf Optimized", self.compress_with_pypdf_optimized))
+        # Availability is only checked when a method is reached, so fallback
+        # libraries are never imported while an earlier method succeeds
+        methods_to_try = [
+            ("PyMuPDF Advanced", pymupdf_available, self.compress_with_pymupdf_advanced),
+            ("pikepdf Enhanced", pikepdf_available, self.compress_with_pikepdf_enhanced),
+            ("pypdf Optimized", pypdf_available, self.compress_with_pypdf_optimized)
+        ]
         
+        # Write to a temporary path so an unhelpful result can be dropped without copying;
+        # the name is unique because parallel workers may share an output name
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path) or ".", suffix=".tmp")
+        os.close(fd)
         success = False
         method_used = "none"
         
-        for method_name, method_func in methods_to_try:
+        for method_name, available, method_func in methods_to_try:
+            if not available():
+                continue
             try:
                 self.logger.info(f"Attempting compression with {method_name}...")
-                success = method_func(input_path, output_path)
-                if success and os.path.exists(output_path):
+                success = method_func(input_path, tmp_path)
+                if success and os.path.getsize(tmp_path) > 0:
                     method_used = method_name
                     break
             except Exception as e:
                 self.logger.warning(f"{method_name} failed: {e}")
                 continue
         
-        if not success or not os.path.exists(output_path):
+        if method_used == "none":
+            os.remove(tmp_path)
             return False, original_size, 0, "none"
         
-        compressed_size = self.get_file_size(output_path)
+        compressed_size = self.get_file_size(tmp_path)
         
-        if compressed_size >= original_size:
-            os.remove(output_path)
-            shutil.copy2(input_path, output_path)
+        if compressed_size < original_size:
+            # mkstemp creates the file owner-only; give the output the input's mode instead
+            shutil.copymode(input_path, tmp_path)
+            os.replace(tmp_path, output_path)
+        else:
+            os.remove(tmp_path)
+            self.link_original(input_path, output_path)
             compressed_size = original_size
             self.logger.warning(f"Compressed file was larger - kept original size")
         
         return True, original_size, compressed_size, method_used
 
+    def link_original(self, input_path, output_path):
+        """Place the original file at the output path, hard-linking it when possible"""
+        if os.path.lexists(output_path):
+            os.remove(output_path)
+        try:
+            os.link(input_path, output_path)
+        except OSError:
+            # Hard links fail across filesystems and on some platforms
+            shutil.copy2(input_path, output_path)
+
     def find_pdf_files(self):
         """Find all PDF files in the input directory"""
-        input_path = Path(INPUT_DIR)
         pdf_files = []
         
-        for file_path in input_path.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() == '.pdf':
-                if file_path.name != "README.txt":
-                    pdf_files.append(file_path)
+        # DirEntry caches the file type from the directory listing, avoiding a stat() per entry
+        with os.scandir(INPUT_DIR) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith('.pdf'):
+                    if entry.name != "README.txt":
+                        pdf_files.append(Path(entry.path))
         
         return pdf_files
 
@@ -447,29 +797,51 @@ class PDFCompressor:
         
         self.logger.info(f"Found {len(pdf_files)} PDF files to compress")
         
-        for pdf_file in pdf_files:
-            self.logger.info(f"\n{'='*60}")
-            self.logger.info(f"Processing: {pdf_file.name}")
-            
-            output_filename = f"compressed_{pdf_file.stem}.pdf"
-            output_path = Path(OUTPUT_DIR) / output_filename
-            
-            try:
-                success, original_size, compressed_size, method = self.compress_pdf(
-                    str(pdf_file), str(output_path)
-                )
+        cpu_count = os.cpu_count() or 1
+        max_workers = min(len(pdf_files), cpu_count)
+        # Split the cores between worker processes so image threads don't oversubscribe them
+        image_threads = max(1, cpu_count // max_workers)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_compress_one, str(pdf_file), OUTPUT_DIR, self.settings, image_threads): pdf_file
+                for pdf_file in pdf_files
+            }
+            
+            for future in as_completed(futures):
+                pdf_file = futures[future]
+                self.logger.info(f"\n{'='*60}")
+                self.logger.info(f"Processing: {pdf_file.name}")
                 
-                if success:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.logger.error(f"✗ Error processing {pdf_file.name}: {e}")
+                    self.compression_stats['errors'] += 1
+                    continue
+                
+                for level, message in result['log']:
+                    self.logger.log(level, message)
+                
+                for key in ('blank_pages_removed', 'duplicate_pages_removed', 'images_optimized'):
+                    self.compression_stats[key] += result['stats'][key]
+                
+                if result['error']:
+                    self.logger.error(f"✗ Error processing {pdf_file.name}: {result['error']}")
+                    self.compression_stats['errors'] += 1
+                    
+                elif result['success']:
+                    original_size = result['original_size']
+                    compressed_size = result['compressed_size']
                     if original_size > 0:
                         compression_ratio = ((original_size - compressed_size) / original_size) * 100
                     else:
                         compression_ratio = 0
                     
-                    self.logger.info(f"✓ Compression successful using {method}")
+                    self.logger.info(f"✓ Compression successful using {result['method']}")
                     self.logger.info(f"  Original size: {self.format_size(original_size)}")
                     self.logger.info(f"  Compressed size: {self.format_size(compressed_size)}")
                     self.logger.info(f"  Space saved: {compression_ratio:.1f}%")
-                    self.logger.info(f"  Output: {output_filename}")
+                    self.logger.info(f"  Output: {result['output_filename']}")
                     
                     self.compression_stats['files_processed'] += 1
                     self.compression_stats['total_original_size'] += original_size
@@ -478,10 +850,6 @@ class PDFCompressor:
                 else:
                     self.logger.error(f"✗ Failed to compress {pdf_file.name}")
                     self.compression_stats['errors'] += 1
-                    
-            except Exception as e:
-                self.logger.error(f"✗ Error processing {pdf_file.name}: {e}")
-                self.compression_stats['errors'] += 1
 
     def print_summary(self):
         """Print compression summary"""
@@ -509,6 +877,52 @@ class PDFCompressor:
         
         self.logger.info(f"{'='*60}")
 
+class _LogBuffer(logging.Handler):
+    """Collect log messages in a worker so the parent process can emit them"""
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append((record.levelno, record.getMessage()))
+
+def _compress_one(path, output_dir, settings, image_threads=1):
+    """Compress a single PDF in a worker process and return its results"""
+    pdf_file = Path(path)
+    output_filename = f"compressed_{pdf_file.stem}.pdf"
+    output_path = Path(output_dir) / output_filename
+    
+    buffer = _LogBuffer()
+    logger = logging.getLogger(f"{__name__}.worker")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(buffer)
+    
+    compressor = PDFCompressor(settings=settings, logger=logger, image_threads=image_threads)
+    result = {
+        'output_filename': output_filename,
+        'success': False,
+        'original_size': 0,
+        'compressed_size': 0,
+        'method': "none",
+        'error': None
+    }
+    
+    try:
+        success, original_size, compressed_size, method = compressor.compress_pdf(
+            str(pdf_file), str(output_path)
+        )
+        result.update(success=success, original_size=original_size,
+                      compressed_size=compressed_size, method=method)
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        logger.removeHandler(buffer)
+    
+    result['stats'] = compressor.compression_stats
+    result['log'] = buffer.messages
+    return result
+
 def main():
     """Main function"""
     print("Advanced PDF Compressor - Content Optimization")